@@ -1,3 +1,6 @@
+from typing import Any
+
+
 class AmazonBedrockError(Exception):
     """
     Any error generated by the Amazon Bedrock integration.
@@ -7,6 +10,14 @@ class AmazonBedrockError(Exception):
     `AmazonBedrockError.message` will exist and have the expected content.
     """
 
+    def __getattr__(self, name: str) -> Any:
+        # Only called when the attribute is not found on the error itself, special names
+        # are never forwarded so that copying and pickling keep working as usual
+        cause = self.__cause__
+        if cause is None or name.startswith("__"):
+            raise AttributeError(name)
+        return getattr(cause, name)
+
 
 class AWSConfigurationError(AmazonBedrockError):
     """Exception raised when AWS is not configured correctly"""
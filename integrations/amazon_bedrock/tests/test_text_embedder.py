@@ -141,5 +141,9 @@ class TestAmazonBedrockTextEmbedder:
                 operation_name="some_operation",
             )
 
-            with pytest.raises(AmazonBedrockInferenceError):
+            with pytest.raises(AmazonBedrockInferenceError) as exc_info:
                 embedder.run(text="some text")
+
+            # attributes of the source error are available on the wrapping error
+            assert exc_info.value.response["Error"]["Code"] == "some_code"
+            assert exc_info.value.operation_name == "some_operation"
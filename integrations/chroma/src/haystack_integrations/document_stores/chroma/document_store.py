@@ -213,6 +213,11 @@ class ChromaDocumentStore:
         :returns:
             The number of documents written
         """
+        # Chroma either computes the embeddings for a whole `add` call or for none of it,
+        # so Documents coming with their own embedding are batched separately from the others.
+        batches: Dict[bool, Dict[str, List[Any]]] = {}
+        seen_ids = set()
+
         for doc in documents:
             if not isinstance(doc, Document):
                 msg = "param 'documents' must contain a list of objects of type Document"
@@ -223,10 +228,14 @@ class ChromaDocumentStore:
                     "ChromaDocumentStore can only store the text field of Documents: "
                     "'array', 'dataframe' and 'blob' will be dropped."
                 )
-            data = {"ids": [doc.id], "documents": [doc.content]}
 
+            # Chroma rejects duplicate ids within the same `add` call, the first occurrence wins
+            if doc.id in seen_ids:
+                continue
+            seen_ids.add(doc.id)
+
+            valid_meta = {}
             if doc.meta:
-                valid_meta = {}
                 discarded_keys = []
 
                 for k, v in doc.meta.items():
@@ -244,12 +253,6 @@ class ChromaDocumentStore:
                         ", ".join([t.__name__ for t in SUPPORTED_TYPES_FOR_METADATA_VALUES]),
                     )
 
-                if valid_meta:
-                    data["metadatas"] = [valid_meta]
-
-            if doc.embedding is not None:
-                data["embeddings"] = [doc.embedding]
-
             if hasattr(doc, "sparse_embedding") and doc.sparse_embedding is not None:
                 logger.warning(
                     "Document %s has the `sparse_embedding` field set,"
@@ -258,7 +261,22 @@ class ChromaDocumentStore:
                     doc.id,
                 )
 
-            self._collection.add(**data)
+            has_embedding = doc.embedding is not None
+            data = batches.setdefault(has_embedding, {"ids": [], "documents": [], "metadatas": [], "embeddings": []})
+            data["ids"].append(doc.id)
+            data["documents"].append(doc.content)
+            # Chroma doesn't accept empty metadata dictionaries
+            data["metadatas"].append(valid_meta or None)
+            if has_embedding:
+                data["embeddings"].append(doc.embedding)
+
+        # Chroma refuses `add` calls bigger than the maximum batch size of the client
+        max_batch_size = self._chroma_client.max_batch_size
+        for has_embedding, data in batches.items():
+            if not has_embedding:
+                del data["embeddings"]
+            for start in range(0, len(data["ids"]), max_batch_size):
+                self._collection.add(**{key: values[start : start + max_batch_size] for key, values in data.items()})
 
         return len(documents)
 
@@ -396,10 +414,8 @@ class ChromaDocumentStore:
                 for v in value:
                     where["$or"].append({field: v})
 
-        for k in keys_to_remove:
-            del filters[k]
-
-        final_where = dict(filters)
+        # Build a new dictionary, the filters passed by the caller must not be modified
+        final_where = {k: v for k, v in filters.items() if k not in keys_to_remove}
         final_where.update(dict(where))
         try:
             if final_where:
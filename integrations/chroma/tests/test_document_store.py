@@ -1,14 +1,15 @@
 # SPDX-FileCopyrightText: 2023-present John Doe <jd@example.com>
 #
 # SPDX-License-Identifier: Apache-2.0
+import copy
+import itertools
 import logging
-import operator
-import uuid
-from typing import List
+from typing import Any, Dict, List
 from unittest import mock
 
 import numpy as np
 import pytest
+from chromadb.api.segment import SegmentAPI
 from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
 from haystack import Document
 from haystack.testing.document_store import (
@@ -18,6 +19,18 @@ from haystack.testing.document_store import (
 )
 
 from haystack_integrations.document_stores.chroma import ChromaDocumentStore
+from haystack_integrations.document_stores.chroma.utils import FUNCTION_REGISTRY
+
+# Chroma only accepts embeddings as lists of Python floats, so a pool of random vectors
+# is generated and converted once, then handed out round-robin by `_TestEmbeddingFunction`
+_EMBEDDINGS_POOL = np.random.default_rng(0).uniform(-1, 1, (256, 768)).tolist()
+_EMBEDDINGS_COUNTER = itertools.count()
+
+# The in-memory Chroma client is shared within a process, each fixture needs its own collection
+_COLLECTION_COUNTER = itertools.count()
+
+# Tests check counts and filters, never recall, so the HNSW index can be as cheap as possible to build
+_HNSW_TEST_PARAMS = {"hnsw:M": 2, "hnsw:construction_ef": 4, "hnsw:search_ef": 4}
 
 
 class _TestEmbeddingFunction(EmbeddingFunction):
@@ -28,8 +41,38 @@ class _TestEmbeddingFunction(EmbeddingFunction):
     """
 
     def __call__(self, input: Documents) -> Embeddings:  # noqa - chroma will inspect the signature, it must match
-        # embed the documents somehow
-        return [np.random.default_rng().uniform(-1, 1, 768).tolist()]
+        # embed the documents somehow, one vector per input as documents are written in batches
+        return [_EMBEDDINGS_POOL[next(_EMBEDDINGS_COUNTER) % len(_EMBEDDINGS_POOL)] for _ in input]
+
+
+_TEST_EMBEDDING_FUNCTION = _TestEmbeddingFunction()
+
+
+@pytest.fixture(scope="class", autouse=True)
+def _register_test_embedding_function():
+    """
+    Make `_TEST_EMBEDDING_FUNCTION` available as "test_function" while the tests of a class run,
+    every store gets the same instance.
+    """
+    with mock.patch.dict(FUNCTION_REGISTRY, {"test_function": lambda: _TEST_EMBEDDING_FUNCTION}):
+        yield
+
+
+def _new_document_store() -> ChromaDocumentStore:
+    return ChromaDocumentStore(
+        embedding_function="test_function",
+        collection_name=f"test_fixture_{next(_COLLECTION_COUNTER)}",
+        # copied since the store adds `hnsw:space` to it
+        metadata=dict(_HNSW_TEST_PARAMS),
+    )
+
+
+@pytest.fixture(scope="class")
+def _seeded() -> Dict[str, Any]:
+    """
+    State shared by `seeded_document_store` and `seeded_docs` across the tests of a class.
+    """
+    return {"store": _new_document_store()}
 
 
 class TestDocumentStore(CountDocumentsTest, DeleteDocumentsTest, LegacyFilterDocumentsTest):
@@ -44,11 +87,39 @@ class TestDocumentStore(CountDocumentsTest, DeleteDocumentsTest, LegacyFilterDoc
         This is the most basic requirement for the child class: provide
         an instance of this document store so the base class can use it.
         """
-        with mock.patch(
-            "haystack_integrations.document_stores.chroma.document_store.get_embedding_function"
-        ) as get_func:
-            get_func.return_value = _TestEmbeddingFunction()
-            return ChromaDocumentStore(embedding_function="test_function", collection_name=str(uuid.uuid1()))
+        return _new_document_store()
+
+    @pytest.fixture
+    def seeded_docs(self, _seeded: Dict[str, Any], filterable_docs: List[Document]) -> List[Document]:
+        """
+        The `filterable_docs` written into `seeded_document_store`. Use them instead of
+        `filterable_docs`, whose ids change at every test because of the random embeddings.
+        """
+        return _seeded.setdefault("docs", filterable_docs)
+
+    @pytest.fixture
+    def seeded_document_store(self, _seeded: Dict[str, Any], seeded_docs: List[Document]) -> ChromaDocumentStore:
+        """
+        A store holding `seeded_docs`, written only once per class.
+        It's shared across tests, so tests using it must not modify it.
+        """
+        if not _seeded.get("written"):
+            _seeded["store"].write_documents(seeded_docs)
+            _seeded["written"] = True
+        return _seeded["store"]
+
+    @pytest.fixture
+    def meta_columns(self, _seeded: Dict[str, Any], seeded_docs: List[Document]) -> Dict[str, np.ndarray]:
+        """
+        The metadata of `seeded_docs` as one array per field, built once per class, so that
+        expected results can be computed with boolean masks. Missing values are `None`.
+        """
+        if "meta_columns" not in _seeded:
+            fields = {field for doc in seeded_docs for field in doc.meta}
+            _seeded["meta_columns"] = {
+                field: np.array([doc.meta.get(field) for doc in seeded_docs], dtype=object) for field in fields
+            }
+        return _seeded["meta_columns"]
 
     def assert_documents_are_equal(self, received: List[Document], expected: List[Document]):
         """
@@ -59,23 +130,34 @@ class TestDocumentStore(CountDocumentsTest, DeleteDocumentsTest, LegacyFilterDoc
         This can happen for example when the Document Store sets a score to returned Documents.
         Since we can't know what the score will be, we can't compare the Documents reliably.
         """
-        received.sort(key=operator.attrgetter("id"))
-        expected.sort(key=operator.attrgetter("id"))
-
-        for doc_received, doc_expected in zip(received, expected):
-            assert doc_received.content == doc_expected.content
-            assert doc_received.meta == doc_expected.meta
+        assert {doc.id: (doc.content, doc.meta) for doc in received} == {
+            doc.id: (doc.content, doc.meta) for doc in expected
+        }
 
-    def test_ne_filter(self, document_store: ChromaDocumentStore, filterable_docs: List[Document]):
+    def test_ne_filter(
+        self,
+        seeded_document_store: ChromaDocumentStore,
+        seeded_docs: List[Document],
+        meta_columns: Dict[str, np.ndarray],
+    ):
         """
         We customize this test because Chroma consider "not equal" true when
         a field is missing
         """
-        document_store.write_documents(filterable_docs)
-        result = document_store.filter_documents(filters={"page": {"$ne": "100"}})
-        self.assert_documents_are_equal(
-            result, [doc for doc in filterable_docs if doc.meta.get("page", "100") != "100"]
-        )
+        result = seeded_document_store.filter_documents(filters={"page": {"$ne": "100"}})
+        page = meta_columns["page"]
+        mask = np.not_equal(page, None) & (page != "100")
+        self.assert_documents_are_equal(result, [seeded_docs[i] for i in np.flatnonzero(mask)])
+
+    def test_filter_documents_does_not_modify_filters(self, seeded_document_store: ChromaDocumentStore):
+        """
+        The same filters can be used for several queries
+        """
+        filters = {"content": "Foo", "name": ["name_0", "name_1"]}
+        original = copy.deepcopy(filters)
+
+        assert seeded_document_store.filter_documents(filters=filters)
+        assert filters == original
 
     def test_delete_empty(self, document_store: ChromaDocumentStore):
         """
@@ -135,6 +217,35 @@ class TestDocumentStore(CountDocumentsTest, DeleteDocumentsTest, LegacyFilterDoc
         assert written_docs[1].meta == {}
         assert written_docs[2].meta == {"ok": 123}
 
+    def test_write_documents_single_batch(self, document_store: ChromaDocumentStore):
+        """
+        Documents with and without embeddings can be written in the same call,
+        duplicated ids within the call are written only once
+        """
+        docs = [
+            Document(content="test doc 1", embedding=[0.1] * 768),
+            Document(content="test doc 2", meta={"ok": 123}),
+            Document(content="test doc 2", meta={"ok": 123}),
+        ]
+
+        assert document_store.write_documents(docs) == 3
+        assert document_store.count_documents() == 2
+        self.assert_documents_are_equal(document_store.filter_documents(), docs[:2])
+
+    def test_write_documents_exceeding_max_batch_size(self, document_store: ChromaDocumentStore):
+        """
+        Documents are split in several `add` calls when they exceed the maximum batch size of the client
+        """
+        docs = [Document(content=f"test doc {i}", embedding=[0.1] * 768) for i in range(3)]
+        docs += [Document(content=f"test doc without embedding {i}") for i in range(3)]
+
+        # the limit is enforced by the server API, the client reads it from there too
+        with mock.patch.object(SegmentAPI, "max_batch_size", new_callable=mock.PropertyMock, return_value=2):
+            assert document_store.write_documents(docs) == 6
+
+        assert document_store.count_documents() == 6
+        self.assert_documents_are_equal(document_store.filter_documents(), docs)
+
     @pytest.mark.integration
     def test_to_json(self, request):
         ds = ChromaDocumentStore(
@@ -178,61 +289,48 @@ class TestDocumentStore(CountDocumentsTest, DeleteDocumentsTest, LegacyFilterDoc
         ChromaDocumentStore("test_1")
 
     @pytest.mark.integration
-    def test_distance_metric_initialization(self):
-        store = ChromaDocumentStore("test_2", distance_function="cosine")
-        assert store._collection.metadata["hnsw:space"] == "cosine"
-
+    def test_invalid_distance_metric_initialization(self):
         with pytest.raises(ValueError):
             ChromaDocumentStore("test_3", distance_function="jaccard")
 
     @pytest.mark.integration
-    def test_distance_metric_reinitialization(self, caplog):
-        store = ChromaDocumentStore("test_4", distance_function="cosine")
-
-        with caplog.at_level(logging.WARNING):
-            new_store = ChromaDocumentStore("test_4", distance_function="ip")
-
-        assert (
-            "Collection already exists. The `distance_function` and `metadata` parameters will be ignored."
-            in caplog.text
-        )
-        assert store._collection.metadata["hnsw:space"] == "cosine"
-        assert new_store._collection.metadata["hnsw:space"] == "cosine"
-
-    @pytest.mark.integration
-    def test_metadata_initialization(self, caplog):
-        store = ChromaDocumentStore(
-            "test_5",
-            distance_function="cosine",
-            metadata={
-                "hnsw:space": "ip",
-                "hnsw:search_ef": 101,
-                "hnsw:construction_ef": 102,
-                "hnsw:M": 103,
-            },
-        )
-        assert store._collection.metadata["hnsw:space"] == "ip"
-        assert store._collection.metadata["hnsw:search_ef"] == 101
-        assert store._collection.metadata["hnsw:construction_ef"] == 102
-        assert store._collection.metadata["hnsw:M"] == 103
+    @pytest.mark.parametrize(
+        "collection_name, init_params, reinit_params, expected_metadata",
+        [
+            (
+                "test_distance_function",
+                {"distance_function": "cosine"},
+                {"distance_function": "ip"},
+                {"hnsw:space": "cosine"},
+            ),
+            (
+                "test_metadata",
+                {
+                    "distance_function": "cosine",
+                    "metadata": {"hnsw:space": "ip", "hnsw:search_ef": 101, "hnsw:construction_ef": 102, "hnsw:M": 103},
+                },
+                {"metadata": {"hnsw:space": "l2", "hnsw:search_ef": 101, "hnsw:construction_ef": 102, "hnsw:M": 103}},
+                {"hnsw:space": "ip", "hnsw:search_ef": 101, "hnsw:construction_ef": 102, "hnsw:M": 103},
+            ),
+        ],
+    )
+    def test_metadata_initialization(self, caplog, collection_name, init_params, reinit_params, expected_metadata):
+        """
+        Collection metadata is set when the collection is created and ignored when it already exists
+        """
+        store = ChromaDocumentStore(collection_name, **init_params)
+        for key, value in expected_metadata.items():
+            assert store._collection.metadata[key] == value
 
         with caplog.at_level(logging.WARNING):
-            new_store = ChromaDocumentStore(
-                "test_5",
-                metadata={
-                    "hnsw:space": "l2",
-                    "hnsw:search_ef": 101,
-                    "hnsw:construction_ef": 102,
-                    "hnsw:M": 103,
-                },
-            )
+            new_store = ChromaDocumentStore(collection_name, **reinit_params)
 
         assert (
             "Collection already exists. The `distance_function` and `metadata` parameters will be ignored."
             in caplog.text
         )
-        assert store._collection.metadata["hnsw:space"] == "ip"
-        assert new_store._collection.metadata["hnsw:space"] == "ip"
+        assert store._collection.metadata["hnsw:space"] == expected_metadata["hnsw:space"]
+        assert new_store._collection.metadata["hnsw:space"] == expected_metadata["hnsw:space"]
 
     @pytest.mark.skip(reason="Filter on dataframe contents is not supported.")
     def test_filter_document_dataframe(self, document_store: ChromaDocumentStore, filterable_docs: List[Document]):